@@ -1,13 +1,41 @@
 from aiofiles import open as aopen
 from aiofiles.threadpool.binary import AsyncBufferedIOBase
 from aiohttp import ClientResponse, ClientSession
+from asyncio import gather
+from collections import deque
+from contextlib import nullcontext
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from io import BytesIO
+from sys import intern
 from typing import Any, AsyncIterable, Callable, NamedTuple, Sequence, overload
 from urllib.parse import urlparse, urljoin
+from uring_file import UringFile, is_available as uring_available
 import os.path as path
 import re
-import xml.etree.ElementTree as ET
+
+_XML_PARSER_OPTIONS: dict[str, Any]
+
+try:
+    from lxml import etree as ET
+
+    # lxml's ET.Element is a factory function, the element type is _Element.
+    XmlElement = ET._Element
+    _XML_PARSER_OPTIONS = {'huge_tree': False, 'collect_ids': False}
+except ImportError:
+    import xml.etree.ElementTree as ET
+
+    XmlElement = ET.Element
+    _XML_PARSER_OPTIONS = {}
+
+_HREF_KEYS = ('href', '{http://www.w3.org/1999/xlink}href')
+
+
+def _fromstring(xml: str | bytes) -> XmlElement:
+    if isinstance(xml, str):
+        xml = xml.encode('utf-8')
+
+    return ET.fromstring(xml, ET.XMLParser(**_XML_PARSER_OPTIONS))
 
 
 @dataclass(frozen=True, eq=True)
@@ -32,7 +60,7 @@ class BbbMetadata:
 
     @overload
     @staticmethod
-    def from_xml(xml: ET.Element) -> 'BbbMetadata':
+    def from_xml(xml: XmlElement) -> 'BbbMetadata':
         ...
 
     @overload
@@ -43,18 +71,27 @@ class BbbMetadata:
     @staticmethod
     def from_xml(xml) -> 'BbbMetadata':
         if isinstance(xml, str):
-            xml = ET.fromstring(xml)
+            xml = _fromstring(xml)
 
-        meta = BbbMetadata.__find_in_xml(xml, 'meta')
-        playback = BbbMetadata.__find_in_xml(xml, 'playback')
+        children = BbbMetadata.__index_children(xml)
+        meta = BbbMetadata.__index_children(
+            BbbMetadata.__find_in_xml(children, 'meta')
+        )
+        playback = BbbMetadata.__index_children(
+            BbbMetadata.__find_in_xml(children, 'playback')
+        )
 
         start_time = datetime.utcfromtimestamp(
-            int(BbbMetadata.__find_in_xml(xml, 'start_time').text or '0') / 1000
+            int(BbbMetadata.__find_in_xml(children, 'start_time').text or '0')
+            / 1000
         )
         end_time = datetime.utcfromtimestamp(
-            int(BbbMetadata.__find_in_xml(xml, 'end_time').text or '0') / 1000
+            int(BbbMetadata.__find_in_xml(children, 'end_time').text or '0')
+            / 1000
+        )
+        participants = int(
+            BbbMetadata.__find_in_xml(children, 'participants').text or '0'
         )
-        participants = int(BbbMetadata.__find_in_xml(xml, 'participants').text or '0')
 
         context_name = BbbMetadata.__find_in_xml(meta, 'bbb-context-name').text or ''
         context_label = BbbMetadata.__find_in_xml(meta, 'bbb-context-label').text or ''
@@ -83,8 +120,16 @@ class BbbMetadata:
         )
 
     @staticmethod
-    def __find_in_xml(xml: ET.Element, tag: str) -> ET.Element:
-        element = xml.find(tag)
+    def __index_children(xml: XmlElement) -> dict[str, XmlElement]:
+        children = {}
+        for child in xml:
+            children.setdefault(child.tag, child)
+
+        return children
+
+    @staticmethod
+    def __find_in_xml(children: dict[str, XmlElement], tag: str) -> XmlElement:
+        element = children.get(tag)
         if element is None:
             raise ValueError(f'Unable to find "{tag}" in the xml.')
 
@@ -99,30 +144,49 @@ class BbbChatEntry:
 
     @overload
     @staticmethod
-    def from_xml(xml: ET.Element) -> Sequence['BbbChatEntry']:
+    def from_xml(xml: XmlElement) -> Sequence['BbbChatEntry']:
         ...
 
     @overload
     @staticmethod
-    def from_xml(xml: str) -> Sequence['BbbChatEntry']:
+    def from_xml(xml: str | bytes) -> Sequence['BbbChatEntry']:
         ...
 
     @staticmethod
     def from_xml(xml) -> Sequence['BbbChatEntry']:
+        if ET.iselement(xml):
+            return [
+                BbbChatEntry.from_chattimeline(chattimeline)
+                for chattimeline in xml.iterfind('chattimeline')
+            ]
+
         if isinstance(xml, str):
-            xml = ET.fromstring(xml)
+            xml = xml.encode('utf-8')
 
         chat = []
-        for chattimeline in xml.iterfind('chattimeline'):
-            in_time = timedelta(seconds=int(chattimeline.attrib['in']))
-            name = chattimeline.attrib['name']
-            message = chattimeline.attrib['message']
-            chat.append(BbbChatEntry(name, message, in_time))
+        root = None
+        for event, element in ET.iterparse(
+            BytesIO(xml), events=('start', 'end'), **_XML_PARSER_OPTIONS
+        ):
+            if root is None:
+                root = element
+            elif event == 'end' and element.tag == 'chattimeline':
+                chat.append(BbbChatEntry.from_chattimeline(element))
+                root.clear()
 
         return chat
 
+    @staticmethod
+    def from_chattimeline(xml: XmlElement) -> 'BbbChatEntry':
+        in_time = timedelta(seconds=int(xml.attrib['in']))
+        name = intern(xml.attrib['name'])
+        message = xml.attrib['message']
+        return BbbChatEntry(name, message, in_time)
+
 
 class BbbFileEntry:
+    DIRECT_IO_THRESHOLD = 32 * 1024 * 1024
+
     _filename: str
     _response: ClientResponse
 
@@ -138,8 +202,7 @@ class BbbFileEntry:
     async def copy_to(
         self,
         destination: AsyncBufferedIOBase,
-        progress_factory: Callable[[int], Any] | None = None,
-        buffer_size: int = 4096
+        progress_factory: Callable[[int], Any] | None = None
     ) -> AsyncBufferedIOBase:
         ...
 
@@ -147,31 +210,44 @@ class BbbFileEntry:
     async def copy_to(
         self,
         destination: str,
-        progress_factory: Callable[[int], Any] | None = None,
-        buffer_size: int = 4096
+        progress_factory: Callable[[int], Any] | None = None
     ) -> str:
         ...
 
     async def copy_to(
-        self, destination, progress_factory=None, buffer_size=4096
-    ) -> str | AsyncBufferedIOBase | None:
-        match destination:
-            case str():
-                fullname = path.join(destination, self._filename)
-                async with aopen(fullname, 'wb') as file:
-                    await BbbFileEntry.__copy_to(
-                        self._response, file, progress_factory, buffer_size
-                    )
-                return fullname
-            case AsyncBufferedIOBase():
-                await BbbFileEntry.__copy_to(
-                    self._response, destination, progress_factory, buffer_size
-                )
-                return destination
+        self, destination, progress_factory=None
+    ) -> str | AsyncBufferedIOBase:
+        if isinstance(destination, str):
+            fullname = path.join(destination, self._filename)
+            file_cm = self.__open_uring(fullname) or aopen(fullname, 'wb')
+
+            result = fullname
+        else:
+            file_cm = nullcontext(destination)
+            result = destination
+
+        async with file_cm as file:
+            await BbbFileEntry.__copy_to(self._response, file, progress_factory)
+
+        return result
 
     def close(self) -> None:
         self._response.close()
 
+    def __open_uring(self, fullname: str) -> UringFile | None:
+        if not uring_available():
+            return None
+
+        size = int(self._response.headers.get('content-length', 0))
+        try:
+            return UringFile(
+                fullname, direct=size >= BbbFileEntry.DIRECT_IO_THRESHOLD
+            )
+        except (OSError, AttributeError):
+            # The ring may still be unusable at runtime (seccomp,
+            # kernel.io_uring_disabled, memlock limits), so use aiofiles.
+            return None
+
     async def __aenter__(self) -> 'BbbFileEntry':
         return self
 
@@ -183,7 +259,6 @@ class BbbFileEntry:
         source: ClientResponse,
         destination: AsyncBufferedIOBase,
         progress_factory: Callable[[int], Any] | None = None,
-        buffer_size: int = 4096,
     ) -> None:
         size = int(source.headers['content-length'])
         content = source.content
@@ -192,9 +267,9 @@ class BbbFileEntry:
         handle_progress = progress_bar.update if progress_bar else lambda _: _
 
         try:
-            async for data in content.iter_chunked(buffer_size):
+            async for data, _ in content.iter_chunks():
                 await destination.write(data)
-                handle_progress(buffer_size)
+                handle_progress(len(data))
         finally:
             if progress_bar is not None:
                 progress_bar.close()
@@ -250,65 +325,64 @@ class BbbSlideEntry(BbbFileEntry):
     @overload
     @staticmethod
     async def from_xml(
-        xml: ET.Element, base_address: str, session: ClientSession | None = None
+        xml: XmlElement, base_address: str, session: ClientSession
     ) -> 'BbbSlideEntry':
         ...
 
     @overload
     @staticmethod
     async def from_xml(
-        xml: str, base_address: str, session: ClientSession | None = None
+        xml: str, base_address: str, session: ClientSession
     ) -> 'BbbSlideEntry':
         ...
 
     @staticmethod
-    async def from_xml(xml, base_address, session=None) -> 'BbbSlideEntry':
+    async def from_xml(xml, base_address, session) -> 'BbbSlideEntry':
+        if session is None:
+            raise ValueError('Unable to download the slide without a session.')
+
         if isinstance(xml, str):
-            xml = ET.fromstring(xml)
+            xml = _fromstring(xml)
 
-        exit_session = session is None
-        session = session or ClientSession()
+        href = next((xml.attrib[k] for k in _HREF_KEYS if k in xml.attrib), None)
+        if href is None:
+            raise ValueError('Unable to find "href" in the xml.')
 
-        try:
-            href = next((k for k in xml.attrib.keys() if 'href' in k), None)
-            if href is None:
-                raise ValueError('Unable to find "href" in the xml.')
+        url = urljoin(base_address, href)
+        filename = path.basename(url)
 
-            url = urljoin(base_address, xml.attrib[href])
-            filename = path.basename(url)
+        in_time = timedelta(seconds=float(xml.attrib['in']))
+        out_time = timedelta(seconds=float(xml.attrib['out']))
 
-            response = await session.get(url)
-            if not response.ok:
-                response.close()
-                raise ValueError(
-                    'Unable to get response stream from the remote server.'
-                )
-
-            in_time = timedelta(seconds=float(xml.attrib['in']))
-            out_time = timedelta(seconds=float(xml.attrib['out']))
+        width = int(xml.attrib['width'])
+        height = int(xml.attrib['height'])
 
-            width = int(xml.attrib['width'])
-            height = int(xml.attrib['height'])
+        x = int(xml.attrib['x'])
+        y = int(xml.attrib['y'])
 
-            x = int(xml.attrib['x'])
-            y = int(xml.attrib['y'])
+        response = await session.get(url)
+        if not response.ok:
+            response.close()
+            raise ValueError('Unable to get response stream from the remote server.')
 
-            return BbbSlideEntry(
-                filename,
-                response,
-                in_time,
-                out_time,
-                BbbSize(width, height),
-                BbbPoint(x, y)
-            )
-        finally:
-            if exit_session:
-                session.close()
+        return BbbSlideEntry(
+            filename,
+            response,
+            in_time,
+            out_time,
+            BbbSize(width, height),
+            BbbPoint(x, y)
+        )
 
 
 class BbbClient:
     AVAILABLE_VIDEO_EXTENSIONS: Sequence[str] = ['.mp4', '.webm']
-    ID_PATTERN = re.compile(r'\w{40}-\d+')
+    MAX_CONCURRENT_SLIDES = 16
+    RESERVED_CONNECTIONS = 4
+    ID_PATTERN = re.compile(r'\w{40}-\d+', re.ASCII)
+    ID_PATH_PATTERN = re.compile(
+        r'/playback/[^/]*/(?:[^/]*/)?([a-zA-Z0-9]{40}-\d+)', re.ASCII
+    )
 
     _base_address: str
     _id: str
@@ -319,10 +393,14 @@ class BbbClient:
         parse_result = urlparse(meeting_url)
         self._base_address = f'{parse_result.scheme}://{parse_result.netloc}'
 
-        id = BbbClient.ID_PATTERN.search(meeting_url)
-        if id is None:
-            raise ValueError(f'Unable to find id in the url "{meeting_url}".')
-        self._id = id[0]
+        id = BbbClient.ID_PATH_PATTERN.search(parse_result.path)
+        if id is not None:
+            self._id = id[1]
+        else:
+            id = BbbClient.ID_PATTERN.search(meeting_url)
+            if id is None:
+                raise ValueError(f'Unable to find id in the url "{meeting_url}".')
+            self._id = id[0]
 
         self._exit_session = session is None
         self._session = session or ClientSession()
@@ -334,20 +412,16 @@ class BbbClient:
 
     async def get_chat(self) -> Sequence[BbbChatEntry]:
         url = self._build_url(f'presentation/{self._id}/slides_new.xml')
-        xml = await self._get_xml(url)
-        return BbbChatEntry.from_xml(xml)
 
-    async def enumerate_deskshares(self) -> AsyncIterable[BbbFileEntry]:
-        for extension in BbbClient.AVAILABLE_VIDEO_EXTENSIONS:
-            filename = f'deskshare{extension}'
-            url = self._build_url(f'presentation/{self._id}/deskshare/{filename}')
+        chat = []
+        async for chattimeline in self._iterparse_xml(url, 'chattimeline'):
+            chat.append(BbbChatEntry.from_chattimeline(chattimeline))
 
-            response = await self._session.get(url)
-            if not response.ok:
-                response.close()
-                continue
+        return chat
 
-            yield BbbFileEntry(filename, response)
+    async def enumerate_deskshares(self) -> AsyncIterable[BbbFileEntry]:
+        async for entry in self._enumerate_videos('deskshare', 'deskshare'):
+            yield entry
 
     async def get_deskshare(self) -> BbbFileEntry | None:
         async for deskshare in self.enumerate_deskshares():
@@ -356,16 +430,8 @@ class BbbClient:
         return None
 
     async def enumerate_webcams(self) -> AsyncIterable[BbbFileEntry]:
-        for extension in BbbClient.AVAILABLE_VIDEO_EXTENSIONS:
-            filename = f'webcams{extension}'
-            url = self._build_url(f'presentation/{self._id}/video/{filename}')
-
-            response = await self._session.get(url)
-            if not response.ok:
-                response.close()
-                continue
-
-            yield BbbFileEntry(filename, response)
+        async for entry in self._enumerate_videos('video', 'webcams'):
+            yield entry
 
     async def get_webcam(self) -> BbbFileEntry | None:
         async for webcam in self.enumerate_webcams():
@@ -374,31 +440,126 @@ class BbbClient:
         return None
 
     async def enumerate_slides(self) -> AsyncIterable[BbbSlideEntry]:
-        slide_base_address = self._build_url(f'presentation/{self._id}/')
-        url = urljoin(f'{slide_base_address}', 'shapes.svg')
+        slide_base_address, images = await self._get_slide_images()
+
+        batch_size = self._get_slide_batch_size()
+        for i in range(0, len(images), batch_size):
+            results = await gather(
+                *(
+                    BbbSlideEntry.from_xml(image, slide_base_address, self._session)
+                    for image in images[i:i + batch_size]
+                ),
+                return_exceptions=True,
+            )
 
-        xml = await self._get_xml(url)
-        for image in xml:
+            slides = deque(r for r in results if isinstance(r, BbbSlideEntry))
             try:
-                yield await BbbSlideEntry.from_xml(
+                while slides:
+                    yield slides.popleft()
+            finally:
+                for slide in slides:
+                    slide.close()
+
+    async def get_slide(self) -> BbbSlideEntry | None:
+        slide_base_address, images = await self._get_slide_images()
+        for image in images:
+            try:
+                return await BbbSlideEntry.from_xml(
                     image, slide_base_address, self._session
                 )
             except Exception:
                 continue
 
-    async def get_slide(self) -> BbbSlideEntry | None:
-        async for slide in self.enumerate_slides():
-            return slide
-
         return None
 
     async def close(self) -> None:
         if self._exit_session:
             await self._session.close()
 
-    async def _get_xml(self, url: str) -> ET.Element:
+    async def _get_slide_images(self) -> tuple[str, Sequence[XmlElement]]:
+        slide_base_address = self._build_url(f'presentation/{self._id}/')
+        url = urljoin(f'{slide_base_address}', 'shapes.svg')
+
+        xml = await self._get_xml(url)
+        return slide_base_address, [*xml.iterfind('{http://www.w3.org/2000/svg}image')]
+
+    def _get_slide_batch_size(self) -> int:
+        # Every fetched slide keeps its connection until it is consumed, and
+        # the caller may hold other responses (webcam, deskshare) from the same
+        # host, so a batch must leave part of the per-host pool free.
+        connector = self._session.connector
+        limits = [
+            limit
+            for limit in (
+                getattr(connector, 'limit_per_host', 0),
+                getattr(connector, 'limit', 0),
+            )
+            if limit
+        ]
+        if not limits:
+            return BbbClient.MAX_CONCURRENT_SLIDES
+
+        available = min(limits) - BbbClient.RESERVED_CONNECTIONS
+        return max(1, min(BbbClient.MAX_CONCURRENT_SLIDES, available))
+
+    async def _enumerate_videos(
+        self, directory: str, name: str
+    ) -> AsyncIterable[BbbFileEntry]:
+        filenames = [
+            f'{name}{extension}' for extension in BbbClient.AVAILABLE_VIDEO_EXTENSIONS
+        ]
+        urls = [
+            self._build_url(f'presentation/{self._id}/{directory}/{filename}')
+            for filename in filenames
+        ]
+
+        available = await self._probe(urls)
+        for filename, url, ok in zip(filenames, urls, available):
+            if ok is False:
+                continue
+
+            response = await self._session.get(url)
+            if not response.ok:
+                response.close()
+                continue
+
+            yield BbbFileEntry(filename, response)
+
+    async def _probe(self, urls: Sequence[str]) -> Sequence[bool | None]:
+        async def probe(url: str) -> bool | None:
+            async with self._session.head(url, allow_redirects=True) as response:
+                if response.ok:
+                    return True
+
+                # Servers may reject HEAD itself (405, 403, ...), so only 404
+                # rules the file out; anything else is left to the GET.
+                return False if response.status == 404 else None
+
+        results = await gather(*(probe(url) for url in urls), return_exceptions=True)
+        return [None if isinstance(result, Exception) else result for result in results]
+
+    async def _get_xml(self, url: str) -> XmlElement:
+        async with self._session.get(self._build_url(url)) as response:
+            return _fromstring(await response.content.read())
+
+    async def _iterparse_xml(self, url: str, tag: str) -> AsyncIterable[XmlElement]:
+        parser = ET.XMLPullParser(events=('start', 'end'), **_XML_PARSER_OPTIONS)
+        root = None
+
         async with self._session.get(self._build_url(url)) as response:
-            return ET.fromstring(await response.content.read())
+            async for data in response.content.iter_any():
+                parser.feed(data)
+                for event, element in parser.read_events():
+                    if root is None:
+                        root = element
+                    elif event == 'end' and element.tag == tag:
+                        yield element
+                        root.clear()
+
+        parser.close()
+        for event, element in parser.read_events():
+            if event == 'end' and element.tag == tag:
+                yield element
 
     def _build_url(self, path: str) -> str:
         return urljoin(self._base_address, path)
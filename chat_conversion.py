@@ -1,10 +1,13 @@
 from aiofiles import open as aopen
 from bbb_client import BbbChatEntry, BbbClient
-from collections import defaultdict
 from datetime import timedelta
+from itertools import chain, groupby
 from os import path
 from subtitles import SubtitlesEntry, apply_mp4_fixes
-from typing import Iterable, Sequence
+from typing import Iterable, Iterator, Sequence
+
+
+__ONE_MICROSECOND = timedelta(microseconds=1)
 
 
 async def build_chat_subtitles(
@@ -14,62 +17,51 @@ async def build_chat_subtitles(
 
     chat = await client.get_chat()
 
-    subtitles = to_subtitles(chat, CHAT_ENTRY_MAX_DURATION)
+    subtitles = iter_subtitles(chat, CHAT_ENTRY_MAX_DURATION)
     subtitles = apply_mp4_fixes(subtitles, recording_duration)
-    if not subtitles:
+
+    first = next(subtitles, None)
+    if first is None:
         return None
 
     filename = path.join(destination, 'subtitles.srt')
-    content = SubtitlesEntry.to_srt(subtitles)
-
     async with aopen(filename, 'w', encoding='utf-8') as file:
-        await file.write(content)
+        await SubtitlesEntry.write_srt(chain((first,), subtitles), file)
 
     return filename
 
 
-def to_subtitles(
+def iter_subtitles(
     entries: Iterable[BbbChatEntry], max_duration: timedelta
-) -> Sequence[SubtitlesEntry]:
-    groups = defaultdict(list)
-    for entry in entries:
-        groups[entry.timestamp].append(entry)
-
-    values = [*groups.values()]
-    if not values:
-        return []
+) -> Iterator[SubtitlesEntry]:
+    previous_group = None
+    for timestamp, group in groupby(entries, key=lambda entry: entry.timestamp):
+        current_group = [*group]
+        if previous_group is not None:
+            previous_segment_time = previous_group[0].timestamp
 
-    result = []
-    for i in range(len(values) - 1):
-        current_group = values[i]
-        next_group = values[i + 1]
+            duration = min(max_duration, timestamp - previous_segment_time)
+            yield from __split_group(previous_group, duration)
 
-        current_segment_time = current_group[0].timestamp
-        next_segment_time = next_group[0].timestamp
+        previous_group = current_group
 
-        duration = min(max_duration, next_segment_time - current_segment_time)
-        result.extend(__split_group(current_group, duration))
-
-    current_group = values[-1]
-    current_segment_time = current_group[0].timestamp
-    result.extend(__split_group(current_group, max_duration))
-
-    return result
+    if previous_group is not None:
+        yield from __split_group(previous_group, max_duration)
 
 
 def __split_group(
     group: Sequence[BbbChatEntry], duration: timedelta
 ) -> Iterable[SubtitlesEntry]:
     size = len(group)
-    part = duration / size
-
     start_time = group[0].timestamp
+    start_us = start_time // __ONE_MICROSECOND
+    duration_us = duration // __ONE_MICROSECOND
+
     current_time = start_time
-    for i in range(size - 1):
-        current = group[i]
-        end_time = current_time + part
+    for i in range(1, size):
+        end_time = timedelta(microseconds=start_us + duration_us * i // size)
 
-        yield SubtitlesEntry(__build_text(current), current_time, end_time)
+        yield SubtitlesEntry(__build_text(group[i - 1]), current_time, end_time)
         current_time = end_time
 
     current = group[-1]
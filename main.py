@@ -5,7 +5,7 @@ from bbb_client import BbbClient
 from chat_conversion import build_chat_subtitles
 from dataclasses import dataclass
 from tempfile import TemporaryDirectory
-from utils import anone, build_video, progress_bar_factory
+from utils import build_video, progress_bar_factory
 
 
 @dataclass(frozen=True, eq=True)
@@ -53,7 +53,17 @@ def parse_arguments() -> DownloadArgs:
 async def main(args: DownloadArgs) -> None:
     with TemporaryDirectory() as temp_dir:
         use_ssl = not args.no_ssl
-        async with ClientSession(connector=TCPConnector(ssl=use_ssl)) as session:
+        connector = TCPConnector(
+            ssl=use_ssl,
+            limit=32,
+            limit_per_host=16,
+            ttl_dns_cache=300,
+            keepalive_timeout=30,
+            enable_cleanup_closed=True,
+        )
+        async with ClientSession(
+            connector=connector, read_bufsize=1024 * 1024
+        ) as session:
             async with BbbClient(args.url, session) as client:
                 metadata = await client.get_metadata()
                 output_filename = (
@@ -68,24 +78,34 @@ async def main(args: DownloadArgs) -> None:
                 deskshare = None if args.no_deskshare else await client.get_deskshare()
 
                 try:
-                    webcam_task = webcam.copy_to(
-                        temp_dir, lambda x: progress_bar_factory(x, 'webcams')
-                    )
-                    deskshare_task = (
-                        deskshare.copy_to(
-                            temp_dir, lambda x: progress_bar_factory(x, 'deskshare')
+                    tasks = [
+                        webcam.copy_to(
+                            temp_dir, lambda x: progress_bar_factory(x, 'webcams')
+                        )
+                    ]
+                    if deskshare is not None:
+                        tasks.append(
+                            deskshare.copy_to(
+                                temp_dir, lambda x: progress_bar_factory(x, 'deskshare')
+                            )
+                        )
+                    if not args.no_chat:
+                        tasks.append(
+                            build_chat_subtitles(client, temp_dir, metadata.duration)
                         )
-                        if deskshare is not None
-                        else anone()
-                    )
-                    subtitles_task = (
-                        anone()
-                        if args.no_chat
-                        else build_chat_subtitles(client, temp_dir, metadata.duration)
-                    )
 
-                    parts = await gather(webcam_task, deskshare_task, subtitles_task)
-                    await build_video(output_filename, *parts)
+                    parts = iter(await gather(*tasks))
+                    webcam_path = next(parts)
+                    deskshare_path = next(parts) if deskshare is not None else None
+                    subtitles_path = None if args.no_chat else next(parts)
+
+                    await build_video(
+                        output_filename,
+                        webcam_path,
+                        deskshare_path,
+                        subtitles_path,
+                        duration=metadata.duration,
+                    )
                 finally:
                     if webcam is not None:
                         webcam.close()
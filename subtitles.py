@@ -1,11 +1,15 @@
+from aiofiles.threadpool.text import AsyncTextIOWrapper
 from dataclasses import dataclass
 from datetime import timedelta
-from math import ceil, modf
-from typing import Iterable, Sequence
+from io import StringIO
+from itertools import chain, islice
+from math import ceil
+from typing import Iterable, Iterator
 
 
 __INT_32_MAX_VALUE = 2**31 - 1
 MAX_VALID_MP4_DURATION = timedelta(microseconds=__INT_32_MAX_VALUE)
+__ONE_MICROSECOND = timedelta(microseconds=1)
 
 
 @dataclass(frozen=True, eq=True)
@@ -19,34 +23,72 @@ class SubtitlesEntry:
 
     @staticmethod
     def to_srt(entries: Iterable['SubtitlesEntry']) -> str:
-        str_entries = (f'{number}\n{entry}' for number, entry in enumerate(entries, 1))
-        return '\n\n'.join(str_entries)
+        format_entry = SubtitlesEntry.__format_entry
+        parts = [
+            format_entry(number, entry) for number, entry in enumerate(entries, 1)
+        ]
+        return '\n\n'.join(parts)
+
+    @staticmethod
+    async def write_srt(
+        entries: Iterable['SubtitlesEntry'],
+        file: AsyncTextIOWrapper,
+        buffer_size: int = 65536,
+    ) -> None:
+        format_entry = SubtitlesEntry.__format_entry
+        buffer = StringIO()
+
+        for number, entry in enumerate(entries, 1):
+            buffer.write(format_entry(number, entry))
+            buffer.write('\n\n')
+            if buffer.tell() >= buffer_size:
+                await file.write(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+
+        await file.write(buffer.getvalue())
+
+    @staticmethod
+    def __format_entry(number: int, entry: 'SubtitlesEntry') -> str:
+        to_srt_format = SubtitlesEntry.__to_srt_format
+        return (
+            f'{number}\n{to_srt_format(entry.start_time)} --> '
+            f'{to_srt_format(entry.end_time)}\n{entry.text}'
+        )
 
     @staticmethod
     def __to_srt_format(delta: timedelta) -> str:
-        hours, remainder1 = divmod(delta.total_seconds(), 3600)
-        minutes, remainder2 = divmod(remainder1, 60)
-        milliseconds, seconds = modf(remainder2)
-        return f'{int(hours):02}:{int(minutes):02}:{int(seconds):02},{f"{milliseconds:.3f}"[2:]}'
+        milliseconds = delta // timedelta(milliseconds=1)
+        hours, milliseconds = divmod(milliseconds, 3600000)
+        minutes, milliseconds = divmod(milliseconds, 60000)
+        seconds, milliseconds = divmod(milliseconds, 1000)
+        return '%02d:%02d:%02d,%03d' % (hours, minutes, seconds, milliseconds)
 
 
 def apply_mp4_fixes(
-    entries: Sequence[SubtitlesEntry],
+    entries: Iterable[SubtitlesEntry],
     recording_duration: timedelta | None = None,
     gape_placeholder: str = '\xa0',
-) -> Sequence[SubtitlesEntry]:
-    result = []
+) -> Iterator[SubtitlesEntry]:
+    previous_entry = None
     for entry in __fill_gapes(entries, gape_placeholder):
-        result.extend(__split_entry(entry))
+        for part in __split_entry(entry):
+            if previous_entry is not None:
+                yield previous_entry
+
+            previous_entry = part
 
-    if result and recording_duration is not None:
-        result[-1] = SubtitlesEntry(
-            result[-1].text,
-            result[-1].start_time,
-            min(result[-1].end_time, recording_duration),
+    if previous_entry is None:
+        return
+
+    if recording_duration is not None:
+        previous_entry = SubtitlesEntry(
+            previous_entry.text,
+            previous_entry.start_time,
+            min(previous_entry.end_time, recording_duration),
         )
 
-    return result
+    yield previous_entry
 
 
 def __split_entry(entry: SubtitlesEntry) -> Iterable[SubtitlesEntry]:
@@ -56,35 +98,35 @@ def __split_entry(entry: SubtitlesEntry) -> Iterable[SubtitlesEntry]:
         return
 
     parts = ceil(duration / MAX_VALID_MP4_DURATION)
-    duration_per_one = duration / parts
+    start_us = entry.start_time // __ONE_MICROSECOND
+    duration_us = duration // __ONE_MICROSECOND
 
-    for i in range(parts - 1):
-        start_time = entry.start_time + duration_per_one * i
-        end_time = start_time + duration_per_one
+    start_time = entry.start_time
+    for i in range(1, parts):
+        end_time = timedelta(microseconds=start_us + duration_us * i // parts)
 
         yield SubtitlesEntry(entry.text, start_time, end_time)
+        start_time = end_time
 
-    start_time = entry.start_time + duration_per_one * (parts - 1)
     yield SubtitlesEntry(entry.text, start_time, entry.end_time)
 
 
 def __fill_gapes(
-    entries: Sequence[SubtitlesEntry], gape_placeholder: str = '\xa0'
+    entries: Iterable[SubtitlesEntry], gape_placeholder: str = '\xa0'
 ) -> Iterable[SubtitlesEntry]:
-    if len(entries) < 2:
-        return entries
-
-    entries = [SubtitlesEntry(gape_placeholder, timedelta(0), timedelta(0)), *entries]
-    for i in range(len(entries) - 1):
-        previous_entry = entries[i]
-        current_entry = entries[i + 1]
+    iterator = iter(entries)
+    head = [*islice(iterator, 2)]
+    if len(head) < 2:
+        yield from head
+        return
 
-        gape_duration = current_entry.start_time - previous_entry.end_time
+    previous_end_time = timedelta(0)
+    for current_entry in chain(head, iterator):
+        gape_duration = current_entry.start_time - previous_end_time
         if gape_duration > MAX_VALID_MP4_DURATION:
             yield SubtitlesEntry(
-                gape_placeholder, previous_entry.end_time, current_entry.start_time
+                gape_placeholder, previous_end_time, current_entry.start_time
             )
 
-        yield SubtitlesEntry(
-            current_entry.text, current_entry.start_time, current_entry.end_time
-        )
+        yield current_entry
+        previous_end_time = current_entry.end_time
@@ -0,0 +1,34 @@
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import IsolatedAsyncioTestCase, main, skipUnless
+from uring_file import UringFile, is_available
+import random
+
+
+@skipUnless(is_available(), 'io_uring backend is not available')
+class UringFileTest(IsolatedAsyncioTestCase):
+    async def test_round_trip(self) -> None:
+        await self.__round_trip(direct=False)
+
+    async def test_round_trip_direct(self) -> None:
+        await self.__round_trip(direct=True)
+
+    async def __round_trip(self, direct: bool) -> None:
+        rng = random.Random(0)
+        chunks = [
+            rng.randbytes(rng.choice([1, 4095, 4096, 65537, 262144, 1048576 + 3]))
+            for _ in range(100)
+        ]
+
+        with TemporaryDirectory() as temp_dir:
+            fullname = path.join(temp_dir, 'output.bin')
+            async with UringFile(fullname, direct=direct) as file:
+                for chunk in chunks:
+                    self.assertEqual(await file.write(chunk), len(chunk))
+
+            with open(fullname, 'rb') as file:
+                self.assertEqual(file.read(), b''.join(chunks))
+
+
+if __name__ == '__main__':
+    main()
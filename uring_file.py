@@ -0,0 +1,281 @@
+from asyncio import Future, ensure_future, shield, to_thread
+from collections import deque
+from errno import EINVAL
+from functools import cache
+from mmap import mmap
+from platform import release, system
+from typing import Any, Callable
+import os
+import re
+
+try:
+    from fcntl import F_GETFL, F_SETFL, fcntl
+    import liburing
+except ImportError:
+    liburing = None
+
+
+MIN_KERNEL_VERSION = (5, 1)
+# UringFile targets the cffi-based liburing API pinned in requirements-uring.txt
+# (2020.7.13); later releases renamed or dropped several of these functions.
+REQUIRED_LIBURING_API = (
+    'io_uring',
+    'io_uring_cqes',
+    'iovec',
+    'files',
+    'trap_error',
+    'io_uring_queue_init',
+    'io_uring_queue_exit',
+    'io_uring_register_buffers',
+    'io_uring_register_files',
+    'io_uring_get_sqe',
+    'io_uring_prep_write_fixed',
+    'io_uring_submit',
+    'io_uring_wait_cqe',
+    'io_uring_cqe_seen',
+    'IOSQE_FIXED_FILE',
+)
+
+
+@cache
+def is_available() -> bool:
+    if liburing is None or system() != 'Linux':
+        return False
+
+    if not all(hasattr(liburing, name) for name in REQUIRED_LIBURING_API):
+        return False
+
+    version = tuple(int(part) for part in re.findall(r'\d+', release())[:2])
+    return version >= MIN_KERNEL_VERSION
+
+
+class UringFile:
+    _fd: int
+    _ring: Any
+    _cqes: Any
+    _buffer_size: int
+    _buffers: list[mmap]
+    _iovecs: Any
+    _free_buffers: deque[int]
+    _current: int | None
+    _filled: int
+    _direct: bool
+    _submit_batch: int
+    _offset: int
+    _unsubmitted: int
+    _in_flight: dict[int, tuple[int, int]]
+    _worker: Future | None
+
+    def __init__(
+        self,
+        filename: str,
+        queue_depth: int = 32,
+        submit_batch: int = 8,
+        buffer_size: int = 262144,
+        direct: bool = False,
+    ) -> None:
+        if not is_available():
+            raise OSError('io_uring is not available on this system.')
+
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+        try:
+            self._fd = os.open(filename, flags | (os.O_DIRECT if direct else 0), 0o644)
+        except OSError as e:
+            # Some filesystems (e.g. tmpfs) do not support O_DIRECT at all.
+            if not direct or e.errno != EINVAL:
+                raise
+
+            direct = False
+            self._fd = os.open(filename, flags, 0o644)
+
+        self._buffers = []
+        self._iovecs = None
+        try:
+            self._ring = liburing.io_uring()
+            self._cqes = liburing.io_uring_cqes()
+            self._buffers = [mmap(-1, buffer_size) for _ in range(queue_depth)]
+            self._iovecs = liburing.iovec(*self._buffers)
+
+            liburing.trap_error(
+                liburing.io_uring_queue_init(queue_depth, self._ring, 0)
+            )
+            try:
+                # Registration pins the pool against RLIMIT_MEMLOCK and fails
+                # with ENOMEM on older kernels; the caller falls back then.
+                liburing.trap_error(
+                    liburing.io_uring_register_buffers(
+                        self._ring, self._iovecs, len(self._buffers)
+                    )
+                )
+                liburing.trap_error(
+                    liburing.io_uring_register_files(
+                        self._ring, liburing.files(self._fd), 1
+                    )
+                )
+            except Exception:
+                liburing.io_uring_queue_exit(self._ring)
+                raise
+        except Exception:
+            self.__release()
+            raise
+
+        self._buffer_size = buffer_size
+        self._free_buffers = deque(range(queue_depth))
+        self._current = None
+        self._filled = 0
+        self._direct = direct
+        self._submit_batch = submit_batch
+        self._offset = 0
+        self._unsubmitted = 0
+        self._in_flight = {}
+        self._worker = None
+
+    async def write(self, data: bytes) -> int:
+        view = memoryview(data)
+        while view:
+            if self._current is None:
+                if not self._free_buffers:
+                    self.__submit()
+                    await self.__run_worker(
+                        self.__reap, max(1, len(self._in_flight) // 2)
+                    )
+
+                self._current = self._free_buffers.popleft()
+                self._filled = 0
+
+            size = min(len(view), self._buffer_size - self._filled)
+            buffer = self._buffers[self._current]
+            buffer[self._filled:self._filled + size] = view[:size]
+            self._filled += size
+            view = view[size:]
+
+            if self._filled == self._buffer_size:
+                self.__enqueue()
+
+        return len(data)
+
+    async def close(self) -> None:
+        try:
+            # A cancelled write may have left a reap running in its thread.
+            await self.__wait_worker()
+
+            if self._current is not None and not self._direct:
+                self.__enqueue()
+
+            self.__submit()
+            await self.__run_worker(self.__reap, len(self._in_flight))
+
+            if self._current is not None:
+                await self.__run_worker(self.__write_tail)
+        finally:
+            if self._worker is None:
+                self.__shutdown()
+            else:
+                # The ring can't be torn down under a running thread.
+                self._worker.add_done_callback(self.__shutdown_after)
+
+    async def __aenter__(self) -> 'UringFile':
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    async def __run_worker(self, function: Callable[..., None], *args: Any) -> None:
+        await self.__wait_worker()
+        self._worker = ensure_future(to_thread(function, *args))
+        await self.__wait_worker()
+
+    async def __wait_worker(self) -> None:
+        worker = self._worker
+        if worker is None:
+            return
+
+        # Cancelling the caller can't stop the thread, so keep the future
+        # around for close() instead of letting another thread touch the ring.
+        try:
+            await shield(worker)
+        finally:
+            if worker.done():
+                self._worker = None
+
+    def __enqueue(self) -> None:
+        index, length = self._current, self._filled
+        self._current = None
+
+        sqe = liburing.io_uring_get_sqe(self._ring)
+        liburing.io_uring_prep_write_fixed(
+            sqe, 0, self._iovecs[index].iov_base, length, self._offset, index
+        )
+        sqe.flags |= liburing.IOSQE_FIXED_FILE
+        sqe.user_data = index
+
+        self._in_flight[index] = (length, self._offset)
+        self._offset += length
+        self._unsubmitted += 1
+
+        if self._unsubmitted >= self._submit_batch:
+            self.__submit()
+
+    def __write_tail(self) -> None:
+        # O_DIRECT requires block-aligned lengths, so the unaligned remainder
+        # is written through the page cache.
+        self.__clear_direct()
+
+        buffer = memoryview(self._buffers[self._current])
+        written = 0
+        while written < self._filled:
+            written += os.pwrite(
+                self._fd, buffer[written:self._filled], self._offset + written
+            )
+
+        self._offset += self._filled
+        self._current = None
+
+    def __clear_direct(self) -> None:
+        if self._direct:
+            flags = fcntl(self._fd, F_GETFL)
+            fcntl(self._fd, F_SETFL, flags & ~os.O_DIRECT)
+
+    def __submit(self) -> None:
+        if self._unsubmitted:
+            liburing.trap_error(liburing.io_uring_submit(self._ring))
+            self._unsubmitted = 0
+
+    def __reap(self, count: int) -> None:
+        for _ in range(count):
+            liburing.trap_error(liburing.io_uring_wait_cqe(self._ring, self._cqes))
+            cqe = self._cqes[0]
+            result, index = cqe.res, cqe.user_data
+            liburing.io_uring_cqe_seen(self._ring, cqe)
+
+            length, offset = self._in_flight.pop(index)
+            if result < 0:
+                raise OSError(-result, os.strerror(-result))
+
+            if result < length:
+                # The remainder of a short write is generally unaligned.
+                self.__clear_direct()
+
+            buffer = memoryview(self._buffers[index])
+            while result < length:
+                result += os.pwrite(self._fd, buffer[result:length], offset + result)
+
+            self._free_buffers.append(index)
+
+    def __shutdown_after(self, worker: Future) -> None:
+        if not worker.cancelled():
+            worker.exception()
+
+        self._worker = None
+        self.__shutdown()
+
+    def __shutdown(self) -> None:
+        liburing.io_uring_queue_exit(self._ring)
+        self.__release()
+
+    def __release(self) -> None:
+        # The registered iovecs export the mmap buffers, so they can't be
+        # closed explicitly; they are unmapped once both are collected.
+        self._iovecs = None
+        self._buffers = []
+        os.close(self._fd)
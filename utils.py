@@ -1,6 +1,8 @@
 from asyncio import create_subprocess_exec
+from asyncio.subprocess import PIPE
+from datetime import timedelta
 from sys import stdin, stdout, stderr
-from typing import TextIO
+from typing import Any, Callable, TextIO
 from tqdm import tqdm
 
 
@@ -8,7 +10,8 @@ async def build_video(
     output_filename: str,
     webcam_path: str,
     deskshare_path: str | None = None,
-    subtitles_path: str | None = None
+    subtitles_path: str | None = None,
+    duration: timedelta | None = None,
 ) -> None:
     input_index = 1
     files = ['-i', webcam_path]
@@ -26,8 +29,55 @@ async def build_video(
         maps.extend(['-c:s', 'mov_text', '-map', f'{input_index}:s:0'])
         input_index += 1
 
-    args = ['ffmpeg', '-y', *files, *maps, output_filename]
-    await pipe_run(*args)
+    codecs = ['-c:v', 'copy', '-c:a', 'copy']
+    flags = ['-movflags', '+faststart']
+    flags.extend(['-progress', 'pipe:1', '-nostats', '-loglevel', 'error'])
+
+    args = ['-y', *files, *maps, *codecs, *flags, output_filename]
+    code, started = await __run_ffmpeg(*args, duration=duration)
+    if code != 0 and not started:
+        # Streams that can't be muxed into mp4 as-is (e.g. VP8 webcams) fail
+        # before any progress is reported and have to be re-encoded.
+        args = ['-y', *files, *maps, *flags, output_filename]
+        code, _ = await __run_ffmpeg(*args, duration=duration)
+
+    if code != 0:
+        raise RuntimeError(
+            f'Unable to build the video, ffmpeg exited with code {code}.'
+        )
+
+
+async def __run_ffmpeg(
+    *args: str, duration: timedelta | None = None
+) -> tuple[int, bool]:
+    progress_bar = (
+        progress_bar_factory(duration // timedelta(milliseconds=1), 'ffmpeg')
+        if duration is not None
+        else None
+    )
+    position = 0
+    started = False
+
+    def handle_output(line: str) -> None:
+        nonlocal position, started
+
+        key, _, value = line.strip().partition('=')
+        if key == 'progress':
+            started = True
+
+        if progress_bar is None or key != 'out_time_us' or not value.isdigit():
+            return
+
+        current = int(value) // 1000
+        progress_bar.update(current - position)
+        position = current
+
+    try:
+        code = await pipe_run('ffmpeg', *args, on_output=handle_output)
+        return code, started
+    finally:
+        if progress_bar is not None:
+            progress_bar.close()
 
 
 async def pipe_run(
@@ -36,18 +86,30 @@ async def pipe_run(
     stdin: TextIO = stdin,
     stdout: TextIO = stdout,
     stderr: TextIO = stderr,
-) -> None:
+    on_output: Callable[[str], Any] | None = None,
+) -> int:
     process = await create_subprocess_exec(
-        program, *args, stdin=stdin, stdout=stdout, stderr=stderr
+        program,
+        *args,
+        stdin=stdin,
+        stdout=stdout if on_output is None else PIPE,
+        stderr=stderr,
     )
-    await process.wait()
+
+    if on_output is not None:
+        async for line in process.stdout:
+            on_output(line.decode(errors='replace'))
+
+    return await process.wait()
 
 
 def progress_bar_factory(size: int, description: str) -> tqdm:
     return tqdm(
-        total=size, ascii=' ▖▘▝▗▚▞█', leave=False, desc=description, colour='#b7d121'
+        total=size,
+        ascii=' ▖▘▝▗▚▞█',
+        leave=False,
+        desc=description,
+        colour='#b7d121',
+        mininterval=0.5,
+        miniters=max(1, size // 1000),
     )
-
-
-async def anone() -> None:
-    return None